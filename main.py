@@ -1,18 +1,32 @@
 from __future__ import annotations
 
+import bisect
+import hashlib
 import json
 import os  # 追加（URLを環境変数から受け取る）
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
-import pandas as pd
+import numpy as np
 import requests
-from bs4 import BeautifulSoup
-import yfinance as yf
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, SoupStrainer
 import jpholiday  # 追加（祝日停止）
 
+# pandas / yfinance は import が重いので、使う関数の中で import する（休場日の停止を軽くする）
+if TYPE_CHECKING:
+    import pandas as pd
+
+try:
+    import orjson  # state.json の読み書き高速化（無ければ標準jsonで代替）
+except ImportError:
+    orjson = None
+
 # =========================
 # 設定（仕様書準拠・確定版）
 # =========================
@@ -28,9 +42,39 @@ UA = (
     "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
 )
 
+# レポート表示：株 → 億株（除算せず逆数を掛ける）
+INV_OKU = 1e-8
+
+# データ取得の並列数（SRC_A / SRC_B / yfinance 3ティッカー）
+FETCH_WORKERS = 5
+
+# HTTP再試行（一時的なエラーのみ）。Retry-After には従わない（長い指定で日次ジョブが止まるため）
+HTTP_RETRIES = 3
+HTTP_BACKOFF = 0.3
+HTTP_RETRY_STATUS = (429, 500, 502, 503, 504)
+
+# HTTP接続プール（このセッションを使うのは SRC_A / SRC_B の2本だけ。yfinance は別セッション）
+HTTP_POOL_HOSTS = 2
+HTTP_POOL_SIZE = 2
+
+# SRC_A は「見出し（id=c_Shares）＋直後の表」だけ使うので、見出しと表以外は木にしない
+_ARB_STRAINER = SoupStrainer(["h1", "h2", "h3", "h4", "h5", "h6", "table"])
+
+# SRC_A の年区切り行（西暦4桁）/ SRC_B の「売買高」見出し
+_YEAR_RE = re.compile(r"\d{4}")
+_VOL_RE = re.compile("売買高")
+
+_CHARSET_RE = re.compile(r"charset=[\"']?([\w.:-]+)", re.IGNORECASE)
+
+# yfinance の期間指定（"10d" / "6mo" / "3y" 等）
+_PERIOD_RE = re.compile(r"(\d+)(d|mo|y)")
+
 # state.json 保持期間（5年）
 STATE_MAX_RECORDS = 1400  # 245営業日/年 ×5=1225 なので余裕を持たせる
 
+# 日付単位の判定（休場日・SQまでの日数）のキャッシュ件数（バックテスト等で多数の日付を回す用）
+DATE_CACHE_SIZE = 4096
+
 # SQ
 SQ_NEAR_DAYS = 5
 MAJOR_SQ_MONTHS = {3, 6, 9, 12}
@@ -60,6 +104,9 @@ TOPIX_PCTL_LOW = 0.10
 TOPIX_DEV200_TH = 0.08
 TOPIX_MIN_POINTS_3Y = 500
 
+# 価格は各ティッカーにつき この期間分を1回だけ取得し、短い期間は末尾を切り出して使う
+PRICE_FETCH_PERIOD = INDEX_LOOKBACK
+
 # 先物−現物（縮小しない＝ストレス）
 BASIS_LOOKBACK_DAYS = 20
 BASIS_SHRINK_WINDOW = 5
@@ -92,10 +139,52 @@ MOVE_MIN_POINTS = 60  # 少なすぎる分位は不安定なので最低限
 
 def get_session() -> requests.Session:
     s = requests.Session()
+    # Accept-Encoding は requests の既定値に任せる（brotli 導入時は br も自動で付く）
     s.headers.update({"User-Agent": UA})
+    # 接続を使い回し（スクレイパ2本ぶんのプール）、一時的なエラーは指数バックオフで再試行する
+    retry = Retry(
+        total=HTTP_RETRIES,
+        backoff_factor=HTTP_BACKOFF,
+        status_forcelist=HTTP_RETRY_STATUS,
+        respect_retry_after_header=False,
+    )
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_HOSTS, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
     return s
 
 
+def fetch_soup(
+    s: requests.Session,
+    url: str,
+    parse_only: Optional[SoupStrainer] = None,
+    anchor_id: Optional[str] = None,
+) -> BeautifulSoup:
+    """
+    URL を取得して BeautifulSoup を返す。
+    本文は str に復号せず、バイト列（r.content）のままパーサへ渡す。
+    文字コードは Content-Type の charset を優先し、無ければ meta charset 等からパーサ側で判定
+    （本文全体を chardet で推定する apparent_encoding は使わない）。
+    parse_only を指定すると該当タグだけを木にする。その結果 anchor_id の要素が
+    見つからない場合（想定外のマークアップ）は、絞り込みなしで解析し直す。
+    """
+    r = s.get(url, timeout=20)
+    r.raise_for_status()
+    body = r.content
+    m = _CHARSET_RE.search(r.headers.get("Content-Type", ""))
+    enc = m.group(1) if m else None
+
+    soup = BeautifulSoup(body, "lxml", from_encoding=enc, parse_only=parse_only)
+    if parse_only is not None and anchor_id and soup.find(id=anchor_id) is None:
+        soup = BeautifulSoup(body, "lxml", from_encoding=enc)
+    return soup
+
+
+_JP_UNITS = {"兆": 10**12, "億": 10**8, "万": 10**4, "": 1}
+_JP_NUM_RE = re.compile(r"(\d+\.?\d*|\.\d+)([兆億万]?)")
+_JP_NUM_NOISE_RE = re.compile(r"[^\d.兆億万]")
+
+
 def parse_jp_num(s: str) -> Optional[float]:
     """
     日本語数値（例：216,974万株 / 10億4878万 / 1.2兆 など）を float（単位：株）に変換。
@@ -107,60 +196,70 @@ def parse_jp_num(s: str) -> Optional[float]:
     if not s or s in {"-", "--"}:
         return None
 
-    units = {"兆": 10**12, "億": 10**8, "万": 10**4}
-    total = 0.0
-    current = ""
-
-    for ch in s:
-        if ch.isdigit() or ch == ".":
-            current += ch
-        elif ch in units:
-            if current:
-                total += float(current) * units[ch]
-                current = ""
-        else:
-            # "株" 等は無視
-            pass
+    # "株" 等の数字・小数点・単位以外は無視し、「数値＋単位」の組を一括で拾う
+    s = _JP_NUM_NOISE_RE.sub("", s)
+    return float(sum(float(num) * _JP_UNITS[unit] for num, unit in _JP_NUM_RE.findall(s)))
 
-    if current:
-        total += float(current)
-    return total
 
+@lru_cache(maxsize=8)
+def sq_dates(year: int) -> Tuple[date, ...]:
+    """その年の各月SQ（第2金曜日）を1〜12月の順で返す。年ごとに1回だけ計算する。"""
+    out = []
+    for month in range(1, 13):
+        first = date(year, month, 1)
+        days_to_first_fri = (4 - first.weekday() + 7) % 7
+        out.append(first + timedelta(days=days_to_first_fri + 7))
+    return tuple(out)
 
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
 def get_days_to_sq(base_date: date) -> int:
     """指定日から直近のSQ（第2金曜日）までの日数（カレンダー日）"""
-    y, m = base_date.year, base_date.month
+    sqs = sq_dates(base_date.year)
+    # 当日以降で最初のSQ（今年の12月SQを過ぎていれば翌年1月SQ）
+    i = bisect.bisect_left(sqs, base_date)
+    sq = sqs[i] if i < len(sqs) else sq_dates(base_date.year + 1)[0]
+    return (sq - base_date).days
 
-    def get_sq_date(year: int, month: int) -> date:
-        first = date(year, month, 1)
-        days_to_first_fri = (4 - first.weekday() + 7) % 7
-        return first + timedelta(days=days_to_first_fri + 7)
 
-    sq = get_sq_date(y, m)
-    if base_date > sq:
-        if m == 12:
-            sq = get_sq_date(y + 1, 1)
-        else:
-            sq = get_sq_date(y, m + 1)
-    return (sq - base_date).days
+def fmt_oku(shares: float) -> str:
+    """株数を「x.xx億株」表記にする（レポート用）。"""
+    return f"{float(shares) * INV_OKU:.2f}億株"
+
+
+def parse_jp_num_many(strs: List[str]) -> np.ndarray:
+    """parse_jp_num を一括で適用し float64 配列にする（無効値は NaN）。"""
+    return np.fromiter(
+        (np.nan if v is None else v for v in map(parse_jp_num, strs)),
+        dtype=np.float64,
+        count=len(strs),
+    )
+
+
+def pctl_below(arr: np.ndarray, value: float) -> float:
+    """arr のうち value 未満の比率（分位位置）。件数を数えるだけで float 化した配列の平均は取らない。"""
+    return float(np.count_nonzero(arr < value) / arr.size)
 
 
 def is_major_sq_month(d: date) -> bool:
     return d.month in MAJOR_SQ_MONTHS
 
 
-def safe_pct_change(series: pd.Series) -> Optional[float]:
-    """直近2点から前日比%（符号付き）を返す。取得不能なら None。"""
-    if series is None or series.dropna().shape[0] < 2:
+def safe_pct_change(arr: Optional[np.ndarray]) -> Optional[float]:
+    """直近2点（NaNを除く）から前日比%（符号付き）を返す。取得不能なら None。"""
+    if arr is None:
         return None
-    s = series.dropna()
-    prev = float(s.iloc[-2])
-    last = float(s.iloc[-1])
+    a = arr[~np.isnan(arr)]
+    if a.size < 2:
+        return None
+    prev = float(a[-2])
+    last = float(a[-1])
     if prev == 0:
         return None
     return (last / prev - 1.0) * 100.0
 
 
+@lru_cache(maxsize=DATE_CACHE_SIZE)
 def is_market_closed(d: date) -> bool:
     """
     停止条件：
@@ -181,8 +280,8 @@ def is_market_closed(d: date) -> bool:
 # 追加：ARB統計（分位・中央値・MARGIN）
 # -------------------------
 
-def _arb_window(net_hist: List[float]) -> Optional[List[float]]:
-    if not net_hist:
+def _arb_window(net_hist: np.ndarray) -> Optional[np.ndarray]:
+    if net_hist.size == 0:
         return None
     if len(net_hist) >= ARB_PCTL_YEAR_POINTS:
         return net_hist[-ARB_PCTL_YEAR_POINTS:]
@@ -191,7 +290,7 @@ def _arb_window(net_hist: List[float]) -> Optional[List[float]]:
     return None
 
 
-def compute_arb_stats(net_hist: List[float], arb_net_latest: float) -> Optional[Dict]:
+def compute_arb_stats(net_hist: np.ndarray, arb_net_latest: float) -> Optional[Dict]:
     """
     ARBの分位・中央値・MARGINを返す。
     - pctl: 直近値がウィンドウ内でどの位置か（< latest の比率）
@@ -202,14 +301,14 @@ def compute_arb_stats(net_hist: List[float], arb_net_latest: float) -> Optional[
     if w is None:
         return None
 
-    s = pd.Series(w).dropna()
-    if s.empty:
+    w = w[np.isfinite(w)]
+    if w.size == 0:
         return None
 
     latest = float(arb_net_latest)
-    pctl = float((s < latest).mean())
+    pctl = pctl_below(w, latest)
 
-    med_abs = float(pd.Series([abs(float(x)) for x in s.tolist()]).median())
+    med_abs = float(np.median(np.abs(w)))
     floor_5 = med_abs * ARB_FLOOR_5_MED_RATIO
     floor_25 = med_abs * ARB_FLOOR_25_MED_RATIO
 
@@ -225,7 +324,7 @@ def compute_arb_stats(net_hist: List[float], arb_net_latest: float) -> Optional[
         "floor_25": float(floor_25),
         "margin_5": float(margin_5),
         "margin_25": float(margin_25),
-        "window_n": int(s.shape[0]),
+        "window_n": int(w.size),
     }
 
 
@@ -244,13 +343,15 @@ def compute_move_abs_q99() -> Optional[float]:
         if close is None or close.dropna().shape[0] < MOVE_MIN_POINTS:
             return None
 
-    c = close.dropna().astype(float)
-    pct = c.pct_change() * 100.0
-    abs_pct = pct.abs().dropna()
-    if abs_pct.shape[0] < MOVE_MIN_POINTS:
+    c = close.to_numpy(dtype=np.float64)
+    c = c[~np.isnan(c)]
+    abs_pct = np.abs((c[1:] / c[:-1] - 1.0) * 100.0)
+    abs_pct = abs_pct[np.isfinite(abs_pct)]
+    if abs_pct.size < MOVE_MIN_POINTS:
         return None
 
-    q = float(abs_pct.quantile(EMERGENCY_Q))
+    # np.quantile は選択（partition）ベースで全体ソートしない。補間は pandas と同じ linear
+    q = float(np.quantile(abs_pct, EMERGENCY_Q))
     return q
 
 
@@ -258,77 +359,87 @@ def compute_move_abs_q99() -> Optional[float]:
 # データ取得
 # =========================
 
-def fetch_arbitrage_data(s: requests.Session) -> Tuple[Optional[date], Optional[float], Optional[float], List[float]]:
+def fetch_arbitrage_data(s: requests.Session) -> Tuple[Optional[date], Optional[float], Optional[float], np.ndarray]:
     """
     SRC_A から、最新の買い残・売り残と、過去のネット残（買い−売り）履歴を取得
     Returns: (最新日付, 最新買い残, 最新売り残, ネット残履歴[古→新])
     """
     if not SRC_A_URL:
-        return None, None, None, []
+        return None, None, None, np.empty(0)
 
     try:
-        r = s.get(SRC_A_URL, timeout=20)
-        r.raise_for_status()
-        r.encoding = r.apparent_encoding
-        soup = BeautifulSoup(r.text, "html.parser")
+        soup = fetch_soup(s, SRC_A_URL, parse_only=_ARB_STRAINER, anchor_id="c_Shares")
 
         header = soup.find(id="c_Shares")
         if not header:
-            return None, None, None, []
+            return None, None, None, np.empty(0)
 
         table = header.find_next("table")
         rows = table.find_all("tr")
 
         current_year = date.today().year
-        net_hist_newest_first: List[float] = []
-        latest_data: Optional[Tuple[date, float, float]] = None
+        # 行ごとの文字列をまず集め、数値化は最後にまとめて行う（表は新→古の順）
+        row_years: List[int] = []
+        date_strs: List[str] = []
+        buy_strs: List[str] = []
+        sell_strs: List[str] = []
 
         for row in rows:
-            if "occ" in row.get("class", []):
-                td = row.find("td")
-                if td and td.text.strip().isdigit():
-                    current_year = int(td.text.strip())
+            # セルの走査は行ごとに1回だけ（直下の td のみ）行い、以降はそのリストを見る
+            tds = row.find_all("td", recursive=False)
+            if not tds:
+                continue
+
+            if "occ" in row.get("class", ()):
+                year_str = tds[0].get_text(strip=True)
+                if _YEAR_RE.fullmatch(year_str):
+                    current_year = int(year_str)
                 continue
 
-            td_date = row.find("td", class_="lf")
+            # 各セルの class は1回だけ取り出して使い回す
+            td_classes = [td.get("class") or () for td in tds]
+            td_date = next((td for td, cls in zip(tds, td_classes) if "lf" in cls), None)
             if not td_date:
                 continue
 
-            cells = row.find_all("td", class_="rt")
+            cells = [td for td, cls in zip(tds, td_classes) if "rt" in cls]
             if len(cells) < 3:
                 continue
 
-            date_str = td_date.get_text(strip=True)
-            buy_str = cells[0].get_text(strip=True)
-            sell_str = cells[2].get_text(strip=True)
-
-            buy_val = parse_jp_num(buy_str)
-            sell_val = parse_jp_num(sell_str)
-            if buy_val is None or sell_val is None:
-                continue
+            row_years.append(current_year)
+            date_strs.append(td_date.get_text(strip=True))
+            buy_strs.append(cells[0].get_text(strip=True))
+            sell_strs.append(cells[2].get_text(strip=True))
 
-            net_val = float(buy_val - sell_val)
-            net_hist_newest_first.append(net_val)
+        buys = parse_jp_num_many(buy_strs)
+        sells = parse_jp_num_many(sell_strs)
+        valid = ~(np.isnan(buys) | np.isnan(sells))
 
-            if "/" in date_str and latest_data is None:
-                try:
-                    mm, dd = map(int, date_str.split("/"))
-                    dt = date(current_year, mm, dd)
-                    if dt > date.today() + timedelta(days=7):
-                        dt = date(current_year - 1, mm, dd)
-                    latest_data = (dt, float(buy_val), float(sell_val))
-                except Exception:
-                    pass
+        # 有効行の抽出（ブールマスク）で1回だけコピーし、古→新の並びはその逆順ビューで得る
+        net_hist = (buys - sells)[valid][::-1]
 
-        net_hist_newest_first.reverse()
+        latest_data: Optional[Tuple[date, float, float]] = None
+        for i in np.flatnonzero(valid):
+            date_str = date_strs[i]
+            if "/" not in date_str:
+                continue
+            try:
+                mm, dd = map(int, date_str.split("/"))
+                dt = date(row_years[i], mm, dd)
+                if dt > date.today() + timedelta(days=7):
+                    dt = date(row_years[i] - 1, mm, dd)
+                latest_data = (dt, float(buys[i]), float(sells[i]))
+                break
+            except Exception:
+                pass
 
         if latest_data:
-            return latest_data[0], latest_data[1], latest_data[2], net_hist_newest_first
+            return latest_data[0], latest_data[1], latest_data[2], net_hist
 
     except Exception as e:
         print(f"[Error] SRC_A fetch: {e}")
 
-    return None, None, None, []
+    return None, None, None, np.empty(0)
 
 
 def fetch_prime_volume(s: requests.Session) -> Tuple[Optional[date], Optional[float]]:
@@ -337,23 +448,19 @@ def fetch_prime_volume(s: requests.Session) -> Tuple[Optional[date], Optional[fl
         return None, None
 
     try:
-        r = s.get(SRC_B_URL, timeout=20)
-        r.raise_for_status()
-        r.encoding = r.apparent_encoding
-        soup = BeautifulSoup(r.text, "html.parser")
+        soup = fetch_soup(s, SRC_B_URL)
 
         page_date = date.today()
 
-        tables = soup.find_all("table")
-        for tbl in tables:
-            th = tbl.find("th", string=re.compile("売買高"))
-            if not th:
-                continue
-            tr = th.find_parent("tr")
-            if not tr:
-                continue
-            tds = tr.find_all("td")
+        # 表ごとに最初の「売買高」見出しだけを見る（その行に値が無ければ次の表へ）。
+        # 表を全件集めず先頭から順に見て、使える行が見つかった時点で打ち切る
+        tbl = soup.find("table")
+        while tbl is not None:
+            th = tbl.find("th", string=_VOL_RE)
+            tr = th.find_parent("tr") if th else None
+            tds = tr.find_all("td") if tr else None
             if not tds:
+                tbl = tbl.find_next("table")
                 continue
 
             vol_str = tds[0].get_text(strip=True)
@@ -368,37 +475,84 @@ def fetch_prime_volume(s: requests.Session) -> Tuple[Optional[date], Optional[fl
     return None, None
 
 
-def fetch_yf_series(ticker: str, period: str, interval: str = "1d") -> Optional[pd.Series]:
-    """yfinanceから終値Seriesを取得。失敗したらNone。"""
+# 取得に成功した終値Seriesだけを (ticker, interval) 単位で保持する（失敗は覚えず、次の呼び出しで取り直す）
+_CLOSE_CACHE: Dict[Tuple[str, str], pd.Series] = {}
+
+
+def _download_close(ticker: str, interval: str) -> Optional[pd.Series]:
+    """yfinanceから PRICE_FETCH_PERIOD 分の終値Seriesを取得（成功したらティッカーごとに1回）。失敗したらNone。"""
+    key = (ticker, interval)
+    cached = _CLOSE_CACHE.get(key)
+    if cached is not None:
+        return cached
+
+    import yfinance as yf
+
     try:
-        df = yf.download(ticker, period=period, interval=interval, progress=False)
+        # 単一ティッカーなので Ticker.history を直接使う（download() のスレッド起動・共有状態・
+        # MultiIndex 整形を通らないので、並列取得もそのまま可能）。配当等のイベント列は不要
+        df = yf.Ticker(ticker).history(
+            period=PRICE_FETCH_PERIOD, interval=interval, auto_adjust=True, actions=False
+        )
         if df is None or df.empty:
             return None
-        close = df["Close"]
-        if isinstance(close, pd.DataFrame):
-            close = close.iloc[:, 0]
-        close = close.dropna()
+        close = df["Close"].dropna()
         if close.empty:
             return None
+        # download() と同じく日付のタイムゾーンを外す（先物と現物を日付で突き合わせるため）
+        if close.index.tz is not None:
+            close.index = close.index.tz_localize(None)
+        _CLOSE_CACHE[key] = close
         return close
     except Exception:
         return None
 
 
+def _period_offset(period: str) -> "pd.DateOffset":
+    """期間指定（"10d" / "1y" 等）を pandas の DateOffset にする。"""
+    import pandas as pd
+
+    m = _PERIOD_RE.fullmatch(period)
+    if not m:
+        raise ValueError(f"unsupported period: {period}")
+    unit = {"d": "days", "mo": "months", "y": "years"}[m.group(2)]
+    return pd.DateOffset(**{unit: int(m.group(1))})
+
+
+def fetch_yf_series(ticker: str, period: str, interval: str = "1d") -> Optional[pd.Series]:
+    """
+    yfinanceから終値Series（末尾 period 分）を取得。失敗したらNone。
+    ダウンロードはティッカーごとに1回だけで、短い期間はキャッシュ済みの系列から切り出す。
+    """
+    close = _download_close(ticker, interval)
+    if close is None:
+        return None
+    if period == PRICE_FETCH_PERIOD:
+        return close
+
+    start = close.index[-1] - _period_offset(period)
+    close = close[close.index >= start]
+    if close.empty:
+        return None
+    return close
+
+
 def compute_topix_position() -> Dict:
     """TOPIX（1306.T）の価格位置（PCTL×DEV200 AND）"""
     close = fetch_yf_series(TOPIX_TICKER, period=INDEX_LOOKBACK, interval="1d")
     if close is None or close.shape[0] < TOPIX_MIN_POINTS_3Y:
         return {"ok": False}
 
-    latest = float(close.iloc[-1])
+    arr = close.to_numpy(dtype=np.float64)
+    latest = float(arr[-1])
 
-    pctl = float((close < latest).mean())
+    pctl = pctl_below(arr, latest)
 
-    if close.shape[0] < 200:
+    if arr.size < 200:
         return {"ok": False}
-    ma200 = float(close.rolling(200).mean().iloc[-1])
-    if ma200 == 0 or pd.isna(ma200):
+    # MA200 は最新値しか使わないので、rolling 全系列ではなく末尾200本の平均だけ計算する
+    ma200 = float(arr[-200:].mean())
+    if ma200 == 0 or np.isnan(ma200):
         return {"ok": False}
     dev200 = float(latest / ma200 - 1.0)
 
@@ -418,12 +572,12 @@ def compute_topix_position() -> Dict:
 def compute_daily_move_pct() -> Dict:
     """前日比%（TOPIXメイン、ダメならN225）"""
     topix_close = fetch_yf_series(TOPIX_TICKER, period="10d", interval="1d")
-    pct = safe_pct_change(topix_close) if topix_close is not None else None
+    pct = safe_pct_change(topix_close.to_numpy(dtype=np.float64)) if topix_close is not None else None
     if pct is not None:
         return {"ok": True, "source": "TOPIX", "pct": float(pct)}
 
     n225_close = fetch_yf_series(N225_TICKER, period="10d", interval="1d")
-    pct = safe_pct_change(n225_close) if n225_close is not None else None
+    pct = safe_pct_change(n225_close.to_numpy(dtype=np.float64)) if n225_close is not None else None
     if pct is not None:
         return {"ok": True, "source": "N225", "pct": float(pct)}
 
@@ -440,13 +594,17 @@ def compute_basis_stuck_nk() -> Dict:
     if fut is None or spot is None:
         return {"ok": False}
 
-    df = pd.DataFrame({"fut": fut, "spot": spot}).dropna()
-    if df.shape[0] < (BASIS_SHRINK_WINDOW + 1):
+    # 両方に値がある日だけで突き合わせる（DataFrame は作らず配列で差を取る）
+    common = fut.index.intersection(spot.index)
+    f = fut.reindex(common).to_numpy(dtype=np.float64)
+    p = spot.reindex(common).to_numpy(dtype=np.float64)
+    mask = ~(np.isnan(f) | np.isnan(p))
+    basis = f[mask] - p[mask]
+    if basis.size < (BASIS_SHRINK_WINDOW + 1):
         return {"ok": False}
 
-    basis = df["fut"] - df["spot"]
-    basis_today = float(basis.iloc[-1])
-    basis_5ago = float(basis.iloc[-(BASIS_SHRINK_WINDOW + 1)])
+    basis_today = float(basis[-1])
+    basis_5ago = float(basis[-(BASIS_SHRINK_WINDOW + 1)])
 
     stuck = abs(basis_today) >= abs(basis_5ago)
     basis_stress_down = (basis_today < 0) and (basis_today <= basis_5ago)
@@ -467,52 +625,99 @@ def compute_basis_stuck_nk() -> Dict:
 def load_state() -> Dict:
     if STATE_PATH.exists():
         try:
-            st = json.loads(STATE_PATH.read_text(encoding="utf-8"))
+            raw = STATE_PATH.read_bytes()
+            st = orjson.loads(raw) if orjson is not None else json.loads(raw.decode("utf-8"))
             if isinstance(st, dict) and "history" in st and isinstance(st["history"], list):
+                # 読み込んだ内容のハッシュ。保存時に同一内容なら書き込みを省く
+                st["_digest"] = hashlib.sha1(raw).digest()
                 return st
         except Exception:
             pass
     return {"history": []}
 
 
+def dump_state_bytes(state: Dict) -> bytes:
+    """state を state.json と同じ書式（indent=2・非ASCIIそのまま）のバイト列にする。"""
+    # "_" 始まりのキーは実行中だけの内部情報（索引・更新フラグ等）なので保存しない
+    state = {k: v for k, v in state.items() if not k.startswith("_")}
+    if orjson is not None:
+        return orjson.dumps(state, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(state, ensure_ascii=False, indent=2).encode("utf-8")
+
+
 def save_state(state: Dict) -> None:
+    """
+    state.json に保存する。中身が読み込み時と同一なら書き込まない。
+    途中で落ちても壊れたファイルを残さないよう、一時ファイルに書いてから置き換える。
+    """
     try:
-        STATE_PATH.write_text(json.dumps(state, ensure_ascii=False, indent=2), encoding="utf-8")
+        data = dump_state_bytes(state)
+        digest = hashlib.sha1(data).digest()
+        if digest != state.get("_digest"):
+            tmp = STATE_PATH.with_suffix(STATE_PATH.suffix + ".tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, STATE_PATH)
+            state["_digest"] = digest
+        state["_dirty"] = False
     except Exception as e:
         print(f"[Error] Save state: {e}")
 
 
+def get_history_index(state: Dict) -> Dict[str, Dict]:
+    """history の date → レコード の索引（内部用。state.json には保存しない）。無ければ作る。"""
+    by_date = state.get("_by_date")
+    if by_date is None:
+        by_date = {}
+        for r in state["history"]:
+            by_date.setdefault(r.get("date"), r)
+        state["_by_date"] = by_date
+    return by_date
+
+
 def update_volume_history(state: Dict, dt: date, vol: float) -> bool:
     """プライム出来高を履歴に追加（5年保持）。同日同値なら更新しない。"""
     ds = dt.isoformat()
     hist = state["history"]
+    by_date = get_history_index(state)
+
+    r = by_date.get(ds)
+    if r is not None:
+        old = r.get("prime_volume")
+        if old == vol:
+            return False
+        r["prime_volume"] = vol
+        state["_dirty"] = True
+        return True
 
-    for r in hist:
-        if r.get("date") == ds:
-            old = r.get("prime_volume")
-            if old == vol:
-                return False
-            r["prime_volume"] = vol
-            return True
-
-    hist.append({"date": ds, "prime_volume": vol})
-    hist.sort(key=lambda x: x.get("date", ""))
+    rec = {"date": ds, "prime_volume": vol}
+    if not hist or hist[-1].get("date", "") <= ds:
+        # 通常は日付順に届くので末尾追加のみ（再ソート不要）
+        hist.append(rec)
+    else:
+        bisect.insort(hist, rec, key=lambda x: x.get("date", ""))
+    by_date[ds] = rec
 
     if len(hist) > STATE_MAX_RECORDS:
+        for old_rec in hist[:-STATE_MAX_RECORDS]:
+            by_date.pop(old_rec.get("date"), None)
         state["history"] = hist[-STATE_MAX_RECORDS:]
+    state["_dirty"] = True
     return True
 
 
 def get_volume_ma(state: Dict, window: int) -> Optional[float]:
+    """直近 window 件（有効値のみ）の出来高平均。履歴は新しい側から window 件分だけ読む。"""
     hist = state.get("history", [])
-    vols = [
-        r["prime_volume"]
-        for r in hist
-        if isinstance(r.get("prime_volume"), (int, float)) and r["prime_volume"] > 0
-    ]
-    if len(vols) < window:
+    recent: List[float] = []
+    for r in reversed(hist):
+        v = r.get("prime_volume")
+        if isinstance(v, (int, float)) and v > 0:
+            recent.append(v)
+            if len(recent) == window:
+                break
+    if len(recent) < window:
         return None
-    recent = vols[-window:]
+    recent.reverse()
     return float(sum(recent) / len(recent))
 
 
@@ -520,11 +725,15 @@ def get_volume_ma(state: Dict, window: int) -> Optional[float]:
 # 判定ロジック
 # =========================
 
-def calc_delta(net_hist: List[float], lag: int) -> Optional[float]:
-    """営業日ベース：net_hist は古→新。lag本前との差分。足りなければNone"""
-    if net_hist is None or len(net_hist) < (lag + 1):
-        return None
-    return float(net_hist[-1] - net_hist[-(lag + 1)])
+def calc_deltas(net_hist: np.ndarray, lags: Tuple[int, ...]) -> List[Optional[float]]:
+    """営業日ベース：net_hist は古→新。各lag本前との差分を一括計算。足りないlagはNone"""
+    n = 0 if net_hist is None else net_hist.size
+    if n == 0:
+        return [None] * len(lags)
+    lags_arr = np.asarray(lags)
+    valid = lags_arr < n
+    deltas = net_hist[-1] - net_hist[n - 1 - np.where(valid, lags_arr, 0)]
+    return [float(d) if ok else None for d, ok in zip(deltas, valid)]
 
 
 def main():
@@ -542,9 +751,19 @@ def main():
     s = get_session()
     state = load_state()
 
+    # 価格は実行ごとに取り直す（同一プロセスで繰り返し呼ばれても前回の終値を使わない）
+    _CLOSE_CACHE.clear()
+
     # 1) データ取得（SRC_A / SRC_B / yfinance）
-    arb_date, arb_buy, arb_sell, arb_net_hist = fetch_arbitrage_data(s)
-    vol_date, prime_vol = fetch_prime_volume(s)
+    #    いずれも通信待ちなので並列に取得する（yfinance はティッカーごとに先読みしてキャッシュに載せる）
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as ex:
+        fut_arb = ex.submit(fetch_arbitrage_data, s)
+        fut_vol = ex.submit(fetch_prime_volume, s)
+        for ticker in (TOPIX_TICKER, N225_TICKER, N225_FUT_TICKER):
+            ex.submit(_download_close, ticker, "1d")
+        # ネット残履歴は float64 配列（古→新）で返り、Δ計算・分位計算でそのまま使い回す
+        arb_date, arb_buy, arb_sell, arb_net_hist = fut_arb.result()
+        vol_date, prime_vol = fut_vol.result()
 
     topix_pos = compute_topix_position()
     move_info = compute_daily_move_pct()
@@ -557,8 +776,8 @@ def main():
     state_updated = False
     if vol_date and isinstance(prime_vol, (int, float)) and prime_vol and prime_vol > 0:
         state_updated = update_volume_history(state, vol_date, float(prime_vol))
-        if state_updated:
-            save_state(state)
+    if state.get("_dirty"):
+        save_state(state)
 
     # 修正：判定不能（INSUFFICIENT）を導入（欠損をNORMALに落とさない）
     insufficient_reasons: List[str] = []
@@ -566,7 +785,7 @@ def main():
     # 必須：ARB（最新BUY/SELLとΔ5計算と分位窓）
     if arb_buy is None or arb_sell is None:
         insufficient_reasons.append("ARB: 最新BUY/SELLが取得不能")
-    d5 = calc_delta(arb_net_hist, ARB_DELTA_MAIN)
+    d3, d5, d25 = calc_deltas(arb_net_hist, (ARB_DELTA_SHORT, ARB_DELTA_MAIN, ARB_DELTA_LONG))
     if d5 is None:
         insufficient_reasons.append("ARB: Δ5が計算不能（履歴不足）")
 
@@ -601,9 +820,7 @@ def main():
         print("ALERT_VOLATILITY_RISK = False")
         return
 
-    # 3) 裁定ネット残ロジック（Δ3/Δ5/Δ25） ※d5は上で計算済み
-    d3 = calc_delta(arb_net_hist, ARB_DELTA_SHORT)
-    d25 = calc_delta(arb_net_hist, ARB_DELTA_LONG)
+    # 3) 裁定ネット残ロジック（Δ3/Δ5/Δ25） ※Δは上で一括計算済み
 
     arb_net_latest = float(arb_buy - arb_sell)
 
@@ -706,7 +923,7 @@ def main():
     print("-" * 50)
 
     print("A) 裁定ネット残（SRC_A）")
-    print(f"   最新 BUY: {arb_buy/1e8:.2f}億株 / SELL: {arb_sell/1e8:.2f}億株 / NET: {arb_net_latest/1e8:.2f}億株")
+    print(f"   最新 BUY: {fmt_oku(arb_buy)} / SELL: {fmt_oku(arb_sell)} / NET: {fmt_oku(arb_net_latest)}")
     print(f"   Δ{ARB_DELTA_SHORT}: {d3 if d3 is not None else 'N/A'}  (INFO加点={arb_info_boost})")
     print(f"   Δ{ARB_DELTA_MAIN}:  {d5 if d5 is not None else 'N/A'}")
     print(f"   Δ{ARB_DELTA_LONG}: {d25 if d25 is not None else 'N/A'}")
@@ -719,7 +936,7 @@ def main():
 
     print("\nC) 流動性の質（出来高×価格変動 不整合）")
     if vol_ratio is not None:
-        print(f"   プライム売買高: {float(prime_vol)/1e8:.2f}億株 / MA20: {float(vol_ma)/1e8:.2f}億株 / 比率: {vol_ratio:.2f}")
+        print(f"   プライム売買高: {fmt_oku(prime_vol)} / MA20: {fmt_oku(vol_ma)} / 比率: {vol_ratio:.2f}")
     else:
         print("   データ不足（state.json蓄積中 or 取得失敗）")
 